@@ -1,14 +1,59 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.routers import auth, organizations, preferences, projects, users
 from app.schemas import Message
+from app.services.document_service import HTTP_TIMEOUT
 from app.settings import Settings
 
 settings = Settings.model_validate({})
-api = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Share one HTTP connection pool between requests and background tasks
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
+        app.state.http_client = client
+        yield
+
+
+api = FastAPI(lifespan=lifespan)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects requests whose declared Content-Length exceeds the configured
+    maximum, before the body is read.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] == 'http':
+            content_length = Headers(scope=scope).get('content-length', '')
+            if (
+                content_length.isdigit()
+                and int(content_length) > settings.MAX_UPLOAD_BYTES
+            ):
+                response = JSONResponse(
+                    status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    content={'detail': 'Request body too large.'},
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+api.add_middleware(UploadSizeLimitMiddleware)
 
 
 # Configure CORS
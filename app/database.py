@@ -1,10 +1,26 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.orm import Session
 
 from app.settings import Settings
 
 settings = Settings.model_validate({})
-engine = create_engine(settings.get_database_url())
+database_url = make_url(settings.get_database_url())
+
+# SQLite in-memory databases use a SingletonThreadPool, which does not
+# accept the QueuePool sizing arguments
+pool_sizing = {}
+if database_url.get_backend_name() != 'sqlite':
+    pool_sizing = {
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+    }
+
+engine = create_engine(
+    database_url,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    **pool_sizing,
+)
 
 
 def get_session():
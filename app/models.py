@@ -1,9 +1,11 @@
 import asyncio
 import logging
+import os
+import time
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, ForeignKey, Table, Text, event, func
+from sqlalchemy import Column, ForeignKey, Index, Table, Text, event, func
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 from app.services.upload_service import delete_file_from_s3
@@ -12,6 +14,20 @@ table_registry = registry()
 
 logger = logging.getLogger(__name__)
 
+
+def uuid7() -> uuid.UUID:
+    """
+    Generates a time-ordered UUID (RFC 9562 version 7), so new primary keys
+    are appended to the right edge of their B-tree index.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFFFFFFFFFF) << 80
+    value |= int.from_bytes(os.urandom(10))
+    value = value & ~(0xF << 76) | (0x7 << 76)  # version
+    value = value & ~(0x3 << 62) | (0x2 << 62)  # variant
+    return uuid.UUID(int=value)
+
+
 # Association table for many-to-many relationship: Organization and User
 organization_user_association = Table(
     'organization_user',
@@ -25,6 +41,7 @@ organization_user_association = Table(
         'user_id',
         ForeignKey('users.id'),
         primary_key=True,
+        index=True,
     ),
 )
 
@@ -34,7 +51,7 @@ class User:
     __tablename__ = 'users'
 
     id: Mapped[uuid.UUID] = mapped_column(
-        init=False, primary_key=True, default_factory=uuid.uuid4
+        init=False, primary_key=True, default_factory=uuid7
     )
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
@@ -54,7 +71,7 @@ class Organization:
     __tablename__ = 'organizations'
 
     id: Mapped[uuid.UUID] = mapped_column(
-        init=False, primary_key=True, default_factory=uuid.uuid4
+        init=False, primary_key=True, default_factory=uuid7
     )
     name: Mapped[str] = mapped_column()
     created_at: Mapped[datetime] = mapped_column(
@@ -83,7 +100,7 @@ class Project:
     __tablename__ = 'projects'
 
     id: Mapped[uuid.UUID] = mapped_column(
-        init=False, primary_key=True, default_factory=uuid.uuid4
+        init=False, primary_key=True, default_factory=uuid7
     )
     name: Mapped[str] = mapped_column()
     description: Mapped[str]
@@ -94,7 +111,7 @@ class Project:
         init=False, nullable=True, default=None
     )
     organization_id: Mapped[uuid.UUID | None] = mapped_column(
-        ForeignKey('organizations.id'), nullable=False
+        ForeignKey('organizations.id'), nullable=False, index=True
     )
     # Many-to-one relationship
     organization: Mapped[Organization | None] = relationship(
@@ -108,6 +125,16 @@ class Project:
     )
 
 
+# The event loop only keeps weak references to tasks, so scheduled S3
+# deletions are held here until they finish
+_pending_deletions: set[asyncio.Task] = set()
+
+
+def _track_deletion(task: asyncio.Task) -> None:
+    _pending_deletions.add(task)
+    task.add_done_callback(_pending_deletions.discard)
+
+
 # Set up event listener for Project deletion
 @event.listens_for(Project, 'before_delete')
 def delete_project_files_from_s3(mapper, connection, target: Project):
@@ -128,7 +155,7 @@ def delete_project_files_from_s3(mapper, connection, target: Project):
 
         # If we're already in an event loop, run the coroutine directly
         if loop.is_running():
-            loop.create_task(delete_all_files())
+            _track_deletion(loop.create_task(delete_all_files()))
         else:
             # If we're not in an event loop, run it to completion
             loop.run_until_complete(delete_all_files())
@@ -139,9 +166,13 @@ def delete_project_files_from_s3(mapper, connection, target: Project):
 @table_registry.mapped_as_dataclass
 class File:
     __tablename__ = 'files'
+    __table_args__ = (
+        # Serves lookups by project as well as listings ordered by recency
+        Index('ix_files_project_created', 'project_id', 'created_at'),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
-        init=False, primary_key=True, default_factory=uuid.uuid4
+        init=False, primary_key=True, default_factory=uuid7
     )
     path: Mapped[str] = mapped_column(init=True)
     size: Mapped[int] = mapped_column(init=True)
@@ -6,6 +6,7 @@ from http import HTTPStatus
 from typing import Annotated
 from uuid import UUID
 
+import httpx
 from fastapi import (
     APIRouter,
     BackgroundTasks,
@@ -15,11 +16,18 @@ from fastapi import (
     Response,
     UploadFile,
 )
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
 from app.database import get_session
-from app.models import File, Organization, Preference, Project, User
+from app.models import (
+    File,
+    Organization,
+    Preference,
+    Project,
+    User,
+    uuid7,
+)
 from app.schemas import (
     FileSchema,
     ProjectList,
@@ -43,6 +51,9 @@ router = APIRouter(
 
 DbSession = Annotated[Session, Depends(get_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+HttpClient = Annotated[
+    httpx.AsyncClient, Depends(document_service.get_http_client)
+]
 
 
 def get_organization(
@@ -94,18 +105,19 @@ def list_organization_projects(
     organization_id: UUID, session: DbSession, user: CurrentUser
 ):
     organization = get_organization(session, user, organization_id)
-    projects = session.scalars(
-        select(Project).where(
+    # Count files in the same query instead of once per project
+    rows = session.execute(
+        select(Project, func.count(File.id))
+        .outerjoin(Project.files)
+        .where(
             Project.organization_id == organization.id,
             Project.deleted_at.is_(None),
         )
+        .group_by(Project.id)
     ).all()
 
     project_list = []
-    for project in projects:
-        file_count = session.scalar(
-            select(func.count()).where(File.project_id == project.id)
-        )
+    for project, file_count in rows:
         if project.organization_id:
             project_list.append(
                 ProjectPublicList(
@@ -114,7 +126,7 @@ def list_organization_projects(
                     description=project.description,
                     organization_id=project.organization_id,
                     created_at=project.created_at,
-                    file_count=file_count or 0,
+                    file_count=file_count,
                 )
             )
 
@@ -220,6 +232,7 @@ async def upload(  # noqa: PLR0913, PLR0917
     files: list[UploadFile],
     session: DbSession,
     background_tasks: BackgroundTasks,
+    http_client: HttpClient,
 ):
     # Verify project exists and user has access
     _ = get_project(session, user, organization_id, project_id)
@@ -229,30 +242,30 @@ async def upload(  # noqa: PLR0913, PLR0917
     results = await asyncio.gather(*upload_tasks)
 
     # Get download URLs for each file
-    download_urls = [
-        await get_download_url(result.path, result.original_filename)
+    download_urls = await asyncio.gather(*[
+        get_download_url(result.path, result.original_filename)
         for result in results
-    ]
+    ])
 
-    # Create file records in database
-    db_files = []
+    # Create file records in database with a single bulk insert
     for result in results:
-        db_file = File(  # type: ignore
-            path=result.path,
-            size=result.size,
-            project_id=project_id,
-            mime_type=result.mime_type,
-            original_filename=result.original_filename,
-        )
-        db_files.append(db_file)
-        session.add(db_file)
-
+        result.id = uuid7()
+    session.execute(
+        insert(File),
+        [
+            {
+                'id': result.id,
+                'path': result.path,
+                'size': result.size,
+                'project_id': project_id,
+                'mime_type': result.mime_type,
+                'original_filename': result.original_filename,
+            }
+            for result in results
+        ],
+    )
     session.commit()
 
-    # Update results with database IDs
-    for result, db_file in zip(results, db_files):
-        result.id = db_file.id
-
     # Schedule processing of each file in the background
     for result, download_url in zip(results, download_urls):
         if result and result.id and result.mime_type == 'application/pdf':
@@ -261,6 +274,7 @@ async def upload(  # noqa: PLR0913, PLR0917
                 download_url,
                 result.id,
                 session,
+                http_client,
             )
 
     return results
@@ -313,7 +327,7 @@ async def delete_file(
 
 
 @router.get('/{project_id}/files/{file_id}', response_model=FileSchema)
-async def read_file(
+def read_file(
     organization_id: UUID,
     project_id: UUID,
     file_id: UUID,
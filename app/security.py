@@ -85,7 +85,7 @@ def verify_token(token: str, token_type: str):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
 
 
-async def get_current_user(
+def get_current_user(
     session: DbSession,
     token: str = Depends(oauth2_scheme),
 ):
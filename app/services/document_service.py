@@ -4,14 +4,30 @@ from uuid import UUID
 
 import httpx
 from dotenv import load_dotenv
+from fastapi import Request
 from sqlalchemy.orm import Session
 
 from app.models import File
 
 load_dotenv()
 
+HTTP_TIMEOUT = httpx.Timeout(timeout=60)
 
-async def extract_text(document_url: str, file_id: UUID, session: Session):
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """
+    Returns the HTTP client opened once in the application lifespan, so its
+    connection pool is reused across requests.
+    """
+    return request.app.state.http_client
+
+
+async def extract_text(
+    document_url: str,
+    file_id: UUID,
+    session: Session,
+    client: httpx.AsyncClient,
+):
     """
     Process the uploaded file by making an HTTP POST request and update the
     contents field.
@@ -19,18 +35,17 @@ async def extract_text(document_url: str, file_id: UUID, session: Session):
     auth_token = os.getenv('AUTH_TOKEN')
     headers = {'Authorization': f'Bearer {auth_token}'}
 
-    async with httpx.AsyncClient(timeout=httpx.Timeout(timeout=60)) as client:
-        response = await client.post(
-            'https://habibasseiss--docling-process.modal.run',
-            headers=headers,
-            json={'document_url': document_url},
-        )
-        response.raise_for_status()
-
-        # Update the contents field with the result
-        result_content = response.text
-        file_record = session.get(File, file_id)
-        if file_record:
-            file_record.contents = result_content
-            file_record.processed_at = datetime.now()
-            session.commit()
+    response = await client.post(
+        'https://habibasseiss--docling-process.modal.run',
+        headers=headers,
+        json={'document_url': document_url},
+    )
+    response.raise_for_status()
+
+    # Update the contents field with the result
+    result_content = response.text
+    file_record = session.get(File, file_id)
+    if file_record:
+        file_record.contents = result_content
+        file_record.processed_at = datetime.now()
+        session.commit()
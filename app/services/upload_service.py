@@ -1,10 +1,14 @@
+import asyncio
 import logging
-import mimetypes
+import os
+from functools import cache
 from http import HTTPStatus
 from uuid import UUID, uuid4
 
 import boto3
 import magic
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from fastapi import HTTPException, UploadFile
 from mypy_boto3_s3.client import S3Client
 
@@ -15,12 +19,58 @@ logger = logging.getLogger(__name__)
 
 settings = Settings.model_validate({})
 
+# Number of leading bytes inspected to detect the MIME type. libmagic
+# looks for the first OOXML part within about 8 KiB of the archive start,
+# so a shorter prefix reports Office documents as plain zip files.
+_MIME_SNIFF_BYTES = 8192
+
+# Supported upload types and the extension used for their S3 keys
+_MIME_EXT = {
+    'application/json': '.json',
+    'application/msword': '.doc',
+    'application/pdf': '.pdf',
+    'application/rtf': '.rtf',
+    'application/vnd.ms-excel': '.xls',
+    'application/vnd.ms-powerpoint': '.ppt',
+    'application/vnd.oasis.opendocument.presentation': '.odp',
+    'application/vnd.oasis.opendocument.spreadsheet': '.ods',
+    'application/vnd.oasis.opendocument.text': '.odt',
+    'application/vnd.openxmlformats-officedocument.presentationml.'
+    'presentation': '.pptx',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.'
+    'sheet': '.xlsx',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.'
+    'document': '.docx',
+    'application/xml': '.xml',
+    'image/bmp': '.bmp',
+    'image/gif': '.gif',
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/svg+xml': '.svg',
+    'image/tiff': '.tiff',
+    'image/webp': '.webp',
+    'text/csv': '.csv',
+    'text/html': '.html',
+    'text/plain': '.txt',
+    'text/rtf': '.rtf',
+    'text/xml': '.xml',
+}
+
+
+@cache
+def get_s3_client() -> S3Client:
+    # boto3 clients are thread-safe and expensive to build, so share one.
+    # Adaptive retries absorb S3 throttling (503 Slow Down) responses.
+    return boto3.client(
+        's3',
+        config=Config(retries={'max_attempts': 10, 'mode': 'adaptive'}),
+    )
+
 
 async def upload_file_to_s3(project_id: UUID, file: UploadFile) -> FileSchema:
-    contents = await file.read()
-    mime_type = str(magic.from_buffer(contents, mime=True))
-    filesize = len(contents)
-    extension = mimetypes.guess_extension(mime_type)
+    head = await file.read(_MIME_SNIFF_BYTES)
+    mime_type = str(magic.from_buffer(head, mime=True))
+    extension = _MIME_EXT.get(mime_type)
 
     if not extension:
         raise HTTPException(
@@ -28,18 +78,28 @@ async def upload_file_to_s3(project_id: UUID, file: UploadFile) -> FileSchema:
             detail='Unsupported file type.',
         )
 
-    key = f'projects/{project_id}/{uuid4()}{extension}'
+    filesize = file.size
+    if filesize is None:
+        filesize = file.file.seek(0, os.SEEK_END)
+    await file.seek(0)
 
-    # Save the file to S3
-    s3: S3Client = boto3.client('s3')
-    s3response = s3.put_object(
-        Body=contents,
-        Bucket=settings.BUCKET_NAME,
-        Key=key,
-        ContentType=mime_type,
-    )
+    # Spread keys across hashed sub-prefixes so S3 can partition them
+    file_id = uuid4()
+    key = f'projects/{project_id}/{file_id.hex[:2]}/{file_id}{extension}'
 
-    if s3response['ResponseMetadata']['HTTPStatusCode'] != HTTPStatus.OK:
+    # Stream the spooled upload to S3 without loading it into memory. The
+    # blocking call runs in a worker thread so concurrent uploads overlap.
+    s3 = get_s3_client()
+    try:
+        await asyncio.to_thread(
+            s3.put_object,
+            Body=file.file,
+            Bucket=settings.BUCKET_NAME,
+            Key=key,
+            ContentType=mime_type,
+        )
+    except ClientError as e:
+        logger.error(f'Error uploading file to S3: {str(e)}')
         raise HTTPException(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
             detail='Failed to upload file to S3.',
@@ -63,14 +123,15 @@ async def delete_file_from_s3(file_path: str) -> None:
         )
 
     # Delete the file from S3
-    s3: S3Client = boto3.client('s3')
-
-    s3response = s3.delete_object(
-        Bucket=settings.BUCKET_NAME,
-        Key=file_path,
-    )
-    response_code = s3response['ResponseMetadata']['HTTPStatusCode']
-    if response_code != HTTPStatus.NO_CONTENT:
+    s3 = get_s3_client()
+    try:
+        await asyncio.to_thread(
+            s3.delete_object,
+            Bucket=settings.BUCKET_NAME,
+            Key=file_path,
+        )
+    except ClientError as e:
+        logger.error(f'Error deleting file from S3: {str(e)}')
         raise HTTPException(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
             detail='Failed to delete file from S3.',
@@ -86,7 +147,7 @@ async def get_download_url(
             detail='No file path provided.',
         )
 
-    s3: S3Client = boto3.client('s3')
+    s3 = get_s3_client()
     params = {
         'Bucket': settings.BUCKET_NAME,
         'Key': file_path,
@@ -1,3 +1,6 @@
+from typing import Any
+
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,19 +17,32 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800
+
     AWS_ACCESS_KEY_ID: str
     AWS_ENDPOINT_URL_S3: str
     AWS_REGION: str
     AWS_SECRET_ACCESS_KEY: str
     BUCKET_NAME: str
+    MAX_UPLOAD_BYTES: int = 50 * 1024 * 1024
 
     CORS_ORIGINS: str
 
-    def get_database_url(self) -> str:
+    _database_url: str = PrivateAttr()
+    _origins: list[str] = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        # Derived values are computed once, when the settings are loaded
         url = self.DATABASE_URL
         if 'postgres://' in url:
             url = url.replace('postgres://', 'postgresql://')
-        return url
+        self._database_url = url
+        self._origins = self.CORS_ORIGINS.split(',')
+
+    def get_database_url(self) -> str:
+        return self._database_url
 
     def get_origins(self) -> list[str]:
-        return self.CORS_ORIGINS.split(',')
+        return self._origins
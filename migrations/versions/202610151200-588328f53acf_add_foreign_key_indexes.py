@@ -0,0 +1,29 @@
+"""add foreign key indexes
+
+Revision ID: 588328f53acf
+Revises: 59f0de858d13
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '588328f53acf'
+down_revision: Union[str, None] = '59f0de858d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_files_project_created', 'files', ['project_id', 'created_at'], unique=False)
+    op.create_index(op.f('ix_organization_user_user_id'), 'organization_user', ['user_id'], unique=False)
+    op.create_index(op.f('ix_projects_organization_id'), 'projects', ['organization_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_projects_organization_id'), table_name='projects')
+    op.drop_index(op.f('ix_organization_user_user_id'), table_name='organization_user')
+    op.drop_index('ix_files_project_created', table_name='files')
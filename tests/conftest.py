@@ -1,110 +1,252 @@
-from typing import Generator
+from contextlib import contextmanager
+from typing import AsyncGenerator, Callable, ContextManager, Generator
+from unittest.mock import MagicMock, patch
 
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import Engine, create_engine
+from httpx import ASGITransport, AsyncClient
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pytest_asyncio import is_async_test
+from sqlalchemy import Engine, create_engine, event
 from sqlalchemy.engine import Connection
 from sqlalchemy.engine.base import Transaction
-from sqlalchemy.orm import Session, clear_mappers, scoped_session, sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
 
+from app import security
 from app.api import api
 from app.database import get_session
-from app.models import User, table_registry
-from app.security import get_password_hash
+from app.models import Organization, Project, User, table_registry
+from app.security import create_access_token, create_refresh_token
+from tests.utils import persist, wait_for_pending_deletions
+
+# Argon2 at its cheapest settings: tests need working hashes, not strong ones
+_FAST_PASSWORD_HASH = PasswordHash((
+    Argon2Hasher(time_cost=1, memory_cost=1024, parallelism=1),
+))
+
+# Both shared users log in with the same password, hashed a single time
+_PASSWORD = 'securepassword'
+_PASSWORD_HASH = _FAST_PASSWORD_HASH.hash(_PASSWORD)
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    """
+    Runs every async test on one event loop shared by the whole session,
+    instead of creating and closing a loop for each test.
+    """
+    session_loop = pytest.mark.asyncio(loop_scope='session')
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
 
 
 @pytest.fixture(scope='session')
 def engine() -> Generator[Engine, None, None]:
     """
     Creates a SQLAlchemy engine instance connected to an in-memory SQLite
-    database.
+    database. The database lives in the test process, so each pytest-xdist
+    worker gets its own copy along with its own session-scoped fixtures.
     """
     engine = create_engine(
-        'sqlite:///:memory:', connect_args={'check_same_thread': False}
+        'sqlite:///:memory:',
+        # Let sqlite3 manage transactions itself so SAVEPOINTs behave
+        connect_args={'check_same_thread': False, 'autocommit': False},
+        # Share the single in-memory database across threads
+        poolclass=StaticPool,
     )
     table_registry.metadata.create_all(engine)  # Create all tables
     yield engine
     table_registry.metadata.drop_all(engine)  # Cleanup after tests
 
 
+@pytest.fixture(scope='session')
+def connection(engine: Engine) -> Generator[Connection, None, None]:
+    """
+    Opens a single connection for the whole test run. Its outer transaction
+    holds the rows of session-scoped fixtures and is never committed.
+    """
+    with engine.connect() as connection:
+        transaction: Transaction = connection.begin()
+        yield connection
+        transaction.rollback()
+
+
 @pytest.fixture
-def session(engine: Engine) -> Generator[Session, None, None]:
+def session(connection: Connection) -> Generator[Session, None, None]:
     """
-    Provides a scoped session for database interactions during tests.
-    Rolls back changes after each test to keep the database clean.
+    Provides a session whose changes are rolled back after each test. Commits
+    made by the test and the application only release SAVEPOINTs nested in
+    the per-test one, so the schema is never recreated between tests.
     """
-    connection: Connection = engine.connect()
-    transaction: Transaction = connection.begin()
-    session_factory = sessionmaker(bind=connection)
-    Session = scoped_session(session_factory)
-    session = Session()
+    transaction: Transaction = connection.begin_nested()
+    session = Session(
+        bind=connection, join_transaction_mode='create_savepoint'
+    )
 
     yield session  # This is the session your tests will use
 
     session.close()
     transaction.rollback()
-    connection.close()
-    Session.remove()
 
 
 @pytest.fixture
-def setup_database(engine: Engine) -> Generator[None, None, None]:
+def count_queries(
+    connection: Connection,
+) -> Callable[[], ContextManager[list[str]]]:
+    """
+    Returns a context manager that records the SELECT statements sent to
+    the database while it is active, to catch N+1 query patterns.
+    """
+
+    @contextmanager
+    def counter() -> Generator[list[str], None, None]:
+        statements: list[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+
+        event.listen(
+            connection, 'before_cursor_execute', before_cursor_execute
+        )
+        try:
+            yield statements
+        finally:
+            event.remove(
+                connection, 'before_cursor_execute', before_cursor_execute
+            )
+
+    return counter
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _fast_password_hashing() -> Generator[None, None, None]:
+    """
+    Makes the application hash passwords with the cheap test parameters.
+    Argon2 hashes embed their parameters, so verification is unaffected.
+    """
+    with patch.object(security, 'pwd_context', _FAST_PASSWORD_HASH):
+        yield
+
+
+@pytest.fixture(scope='session')
+def _s3_client_mock() -> Generator[MagicMock, None, None]:
+    """
+    Replaces the shared S3 client for the whole run so no test reaches a
+    real bucket, including deletions scheduled by model events.
+    """
+    with patch('app.services.upload_service.get_s3_client') as mock:
+        yield mock.return_value
+
+
+@pytest.fixture(autouse=True)
+def s3_client(_s3_client_mock: MagicMock) -> Generator[MagicMock, None, None]:
+    """
+    Hands each test the S3 client mock with no recorded calls, return values
+    or side effects left over from previous tests.
+    """
+    yield _s3_client_mock
+    _s3_client_mock.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope='session')
+def app_client() -> Generator[TestClient, None, None]:
     """
-    Optional fixture to prepare the database with test data before each test.
+    Starts the application and its client once for the whole test run.
+    Tests should use the ``client`` fixture instead.
     """
-    clear_mappers()
-    table_registry.metadata.create_all(engine)
-    yield
-    table_registry.metadata.drop_all(engine)
+    with TestClient(api) as client:
+        yield client
 
 
 @pytest.fixture
-def client(session: Session) -> Generator[TestClient, None, None]:
+def client(
+    app_client: TestClient, session: Session
+) -> Generator[TestClient, None, None]:
     def get_session_override():
         return session
 
-    with TestClient(api) as client:
-        api.dependency_overrides[get_session] = get_session_override
-        yield client
+    api.dependency_overrides[get_session] = get_session_override
+    yield app_client
+    api.dependency_overrides.clear()
+    # Let deletions scheduled by this test reach its own S3 mock
+    app_client.portal.call(wait_for_pending_deletions)  # type: ignore
+
+
+@pytest_asyncio.fixture
+async def async_client(session: Session) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Calls the application directly on the running test's event loop, for
+    async tests. The lifespan does not run, so dependencies that read
+    ``app.state`` must be overridden.
+    """
 
+    def get_session_override():
+        return session
+
+    api.dependency_overrides[get_session] = get_session_override
+    async with AsyncClient(
+        transport=ASGITransport(app=api),
+        base_url='http://test',
+        # Behave like TestClient, which follows redirects
+        follow_redirects=True,
+    ) as client:
+        yield client
     api.dependency_overrides.clear()
+    await wait_for_pending_deletions()
 
 
-@pytest.fixture
-def user(session: Session) -> User:
+@pytest.fixture(scope='session')
+def user(connection: Connection) -> User:
     user = User(  # type: ignore
         email='test@example.com',
-        password=get_password_hash('securepassword'),
+        password=_PASSWORD_HASH,
     )
+    persist(connection, user)
 
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-
-    user.clean_password = 'securepassword'  # type: ignore
+    user.clean_password = _PASSWORD  # type: ignore
 
     return user
 
 
-@pytest.fixture
-def token(client: TestClient, user: User) -> str:
-    response = client.post(
-        '/auth/token',
-        data={
-            'username': user.email,
-            'password': user.clean_password,  # type: ignore
-        },
+@pytest.fixture(scope='session')
+def other_user(connection: Connection) -> User:
+    organization = Organization(name='Other Organization')  # type: ignore
+    project = Project(  # type: ignore
+        name='Other Project',
+        description='Another test project',
+        organization=organization,
+        organization_id=organization.id,
+    )
+    user = User(  # type: ignore
+        email='test2@example.com',
+        password=_PASSWORD_HASH,
+        organizations=[organization],
     )
-    return response.json()['access_token']
+    persist(connection, user, project)
 
+    user.clean_password = _PASSWORD  # type: ignore
 
-@pytest.fixture
-def refresh_token(client: TestClient, user: User) -> str:
-    response = client.post(
-        '/auth/token',
-        data={
-            'username': user.email,
-            'password': user.clean_password,  # type: ignore
-        },
-    )
-    return response.json()['refresh_token']
+    return user
+
+
+@pytest.fixture(scope='session')
+def token(user: User) -> str:
+    """
+    Access token for ``user``, signed once the same way the login endpoint
+    does. Logging in is covered by the auth tests.
+    """
+    return create_access_token(data={'sub': user.email})
+
+
+@pytest.fixture(scope='session')
+def refresh_token(user: User) -> str:
+    return create_refresh_token(data={'sub': user.email})
+
+
+@pytest.fixture(scope='session')
+def auth_headers(token: str) -> dict[str, str]:
+    return {'Authorization': f'Bearer {token}'}
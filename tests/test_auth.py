@@ -1,29 +1,11 @@
 from http import HTTPStatus
 
-import pytest
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
 from jwt import decode
-from sqlalchemy.orm import Session
 
 from app.models import User
-from app.security import create_access_token, get_password_hash, settings
-
-
-@pytest.fixture
-def user(session: Session) -> User:
-    user = User(  # type: ignore
-        email='test@example.com',
-        password=get_password_hash('securepassword'),
-    )
-
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-
-    user.clean_password = 'securepassword'  # type: ignore
-
-    return user
+from app.security import create_access_token, settings
 
 
 def test_jwt():
@@ -1,20 +1,31 @@
 from sqlalchemy.orm import Session
 
-from app.models import User
+from app.models import User, uuid7
 
 
 def test_user_creation(session: Session):
     # Create a new user
     user = User(  # type: ignore
-        email='test@example.com',
+        email='alice@example.com',
         password='securepassword',
     )
     session.add(user)
     session.commit()
 
     # Verify user is persisted
-    queried_user = (
-        session.query(User).filter_by(email='test@example.com').first()
-    )
+    queried_user = session.get(User, user.id)
     assert queried_user is not None
-    assert queried_user.email == 'test@example.com'
+    assert queried_user.email == 'alice@example.com'
+
+
+def test_user_id_is_time_ordered_uuid7(session: Session):
+    user = User(  # type: ignore
+        email='alice@example.com',
+        password='securepassword',
+    )
+    session.add(user)
+    session.commit()
+
+    assert user.id.version == 7  # noqa: PLR2004
+    # The leading 48 bits hold the creation time in milliseconds
+    assert user.id.int >> 80 <= uuid7().int >> 80
@@ -3,10 +3,10 @@ from http import HTTPStatus
 from fastapi.testclient import TestClient
 
 
-def test_list_organizations(client: TestClient, token: str):
+def test_list_organizations(client: TestClient, auth_headers: dict[str, str]):
     response = client.get(
         '/organizations/',
-        headers={'Authorization': f'Bearer {token}'},
+        headers=auth_headers,
     )
     assert response.status_code == HTTPStatus.OK
     assert 'organizations' in response.json()
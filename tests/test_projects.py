@@ -1,104 +1,286 @@
 import uuid
 from http import HTTPStatus
-from unittest.mock import MagicMock, call, patch
+from types import SimpleNamespace
+from typing import AsyncGenerator, Callable, ContextManager, Generator
+from unittest.mock import AsyncMock, MagicMock, call
 
+import httpx
 import pytest
+import pytest_asyncio
+from botocore.exceptions import ClientError
 from fastapi.testclient import TestClient
-from mypy_boto3_s3.client import S3Client
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session
 
-from app.models import File, Organization, Project, User
+from app.api import api
+from app.models import File, Organization, Project, User, uuid7
 from app.schemas import FileSchema
-from app.security import get_password_hash
+from app.security import get_current_user
+from app.services.document_service import get_http_client
 from app.settings import Settings
+from tests.utils import persist
 
 settings = Settings.model_validate({})
 
 
-@pytest.fixture
-def organization(session: Session, user: User) -> Organization:
+@pytest.fixture(scope='session')
+def organization(connection: Connection, user: User) -> Organization:
     organization = Organization(  # type: ignore
         name='Test Organization',
         users=[user],
     )
-    session.add(organization)
-    session.commit()
-    session.refresh(organization)
+    persist(connection, organization)
     return organization
 
 
-@pytest.fixture
-def project(session: Session, organization: Organization) -> Project:
+@pytest.fixture(scope='session')
+def project(connection: Connection, organization: Organization) -> Project:
     project = Project(  # type: ignore
         name='Test Project',
         description='A test project',
         organization_id=organization.id,
         organization=organization,
     )
-    session.add(project)
-    session.commit()
-    session.refresh(project)
+    persist(connection, project)
     return project
 
 
+@pytest.fixture(autouse=True)
+def current_user(user: User) -> Generator[User, None, None]:
+    """
+    Authenticates every request in this module as ``user`` without decoding
+    a token or querying the database. Authentication itself is covered by
+    the auth tests.
+    """
+    api.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    api.dependency_overrides.pop(get_current_user, None)
+
+
+# Router collaborators are replaced by mocks built once at import time and
+# reset after each test, instead of being re-created by patch() every time
+_UPLOAD_MOCK = AsyncMock()
+_DOWNLOAD_URL_MOCK = AsyncMock()
+_EXTRACT_TEXT_MOCK = AsyncMock()
+_DELETE_MOCK = AsyncMock()
+
+
+# Upload payload shared by the upload tests
+_PDF_BYTES = b'%PDF-1.4 fake pdf content'
+_PDF_FILES = [('files', ('test.pdf', _PDF_BYTES, 'application/pdf'))]
+_MOCKED_FILE = FileSchema(
+    path='mocked/path/to/test.pdf',
+    size=len(_PDF_BYTES),
+    mime_type='application/pdf',
+    original_filename='test.pdf',
+    contents=None,
+    processed_at=None,
+)
+
+
+def _install_mock(
+    monkeypatch: pytest.MonkeyPatch, target: str, mock: AsyncMock
+) -> Generator[AsyncMock, None, None]:
+    monkeypatch.setattr(target, mock)
+    yield mock
+    mock.reset_mock(return_value=True, side_effect=True)
+
+
 @pytest.fixture
-def other_user(session: Session) -> User:
-    user = User(  # type: ignore
-        email='test2@example.com',
-        password=get_password_hash('securepassword'),
-        organizations=[
-            Organization(  # type: ignore
-                name='Other Organization',
-                projects=[],
-            ),
-        ],
+def mock_upload(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[AsyncMock, None, None]:
+    yield from _install_mock(
+        monkeypatch, 'app.routers.projects.upload_file_to_s3', _UPLOAD_MOCK
+    )
+
+
+@pytest.fixture
+def mock_get_url(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[AsyncMock, None, None]:
+    yield from _install_mock(
+        monkeypatch,
+        'app.routers.projects.get_download_url',
+        _DOWNLOAD_URL_MOCK,
     )
-    Project(  # type: ignore
-        name='Other Project',
-        description='Another test project',
-        organization=user.organizations[0],
-        organization_id=user.organizations[0].id,
+
+
+@pytest.fixture
+def mock_extract_text(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[AsyncMock, None, None]:
+    yield from _install_mock(
+        monkeypatch,
+        'app.routers.projects.document_service.extract_text',
+        _EXTRACT_TEXT_MOCK,
     )
 
-    session.add(user)
+
+@pytest.fixture
+def mock_delete(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[AsyncMock, None, None]:
+    yield from _install_mock(
+        monkeypatch, 'app.routers.projects.delete_file_from_s3', _DELETE_MOCK
+    )
+
+
+@pytest_asyncio.fixture
+async def processing_client() -> AsyncGenerator[httpx.AsyncClient, None]:
+    """
+    Stands in for the document processing service, answering its requests
+    without leaving the process.
+    """
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(
+                HTTPStatus.OK, text='processed content'
+            )
+        )
+    )
+    api.dependency_overrides[get_http_client] = lambda: client
+    yield client
+    api.dependency_overrides.pop(get_http_client, None)
+    await client.aclose()
+
+
+@pytest.fixture(scope='session')
+def urls(organization: Organization, project: Project) -> SimpleNamespace:
+    """
+    Endpoints of the shared organization and project, formatted once.
+    """
+    projects = f'/organizations/{organization.id}/projects'
+    project_url = f'{projects}/{project.id}'
+    return SimpleNamespace(
+        projects=projects,
+        project=project_url,
+        files=f'{project_url}/files',
+        hard=f'{project_url}/hard',
+    )
+
+
+def _insert_files(
+    session: Session, project: Project, count: int = 3
+) -> list[SimpleNamespace]:
+    """
+    Inserts ``count`` text files into ``project`` with a single statement and
+    returns their ids and paths, which is all the assertions need.
+    """
+    rows = session.execute(
+        insert(File).returning(
+            File.id, File.path, sort_by_parameter_order=True
+        ),
+        [
+            {
+                'id': uuid7(),
+                'path': f'projects/{project.id}/test{i}.txt',
+                'size': 100,
+                'mime_type': 'text/plain',
+                'original_filename': f'test{i}.txt',
+                'project_id': project.id,
+            }
+            for i in range(count)
+        ],
+    ).all()
+    session.commit()
+    return [SimpleNamespace(id=row.id, path=row.path) for row in rows]
+
+
+def _insert_file(
+    session: Session, project_id: uuid.UUID, **values: object
+) -> SimpleNamespace:
+    """
+    Inserts a single text file into ``project_id``, with ``values`` replacing
+    the defaults, and returns the stored values.
+    """
+    row = {
+        'id': uuid7(),
+        'path': 'test_file.txt',
+        'size': 100,
+        'mime_type': 'text/plain',
+        'original_filename': 'test_file.txt',
+        'project_id': project_id,
+        **values,
+    }
+    session.execute(insert(File), row)
     session.commit()
-    session.refresh(user)
+    return SimpleNamespace(**row)
 
-    user.clean_password = 'securepassword'  # type: ignore
 
-    return user
+def _existing_file_ids(
+    session: Session, file_ids: set[uuid.UUID]
+) -> set[uuid.UUID]:
+    """
+    Returns which of ``file_ids`` are still stored, with a single query.
+    """
+    return set(session.scalars(select(File.id).where(File.id.in_(file_ids))))
 
 
 def test_list_projects(
-    client: TestClient, token: str, organization: Organization
+    client: TestClient,
+    urls: SimpleNamespace,
 ):
-    response = client.get(
-        f'/organizations/{organization.id}/projects',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.get(urls.projects)
     assert response.status_code == HTTPStatus.OK
     assert 'projects' in response.json()
 
 
+def test_list_projects_counts_files_in_one_query(  # noqa: PLR0913, PLR0917
+    client: TestClient,
+    urls: SimpleNamespace,
+    organization: Organization,
+    project: Project,
+    session: Session,
+    count_queries: Callable[[], ContextManager[list[str]]],
+):
+    db_organization = session.get(Organization, organization.id)
+    projects = [
+        Project(  # type: ignore
+            name=f'Project {i}',
+            description='Project with files',
+            organization_id=organization.id,
+            organization=db_organization,
+        )
+        for i in range(3)
+    ]
+    session.add_all(projects)
+    session.commit()
+    expected = {}
+    for file_count, new_project in enumerate(projects, start=1):
+        _insert_files(session, new_project, file_count)
+        expected[str(new_project.id)] = file_count
+
+    with count_queries() as queries:
+        response = client.get(urls.projects)
+
+    assert response.status_code == HTTPStatus.OK
+    file_counts = {
+        item['id']: item['file_count'] for item in response.json()['projects']
+    }
+    assert file_counts == {**expected, str(project.id): 0}
+    # The organization lookup and the project listing, whatever the number
+    # of projects
+    assert len(queries) == 2  # noqa: PLR2004
+
+
 def test_create_project(
-    client: TestClient, token: str, organization: Organization
+    client: TestClient,
+    urls: SimpleNamespace,
 ):
     project_data = {
         'name': 'New Project',
         'description': 'New project description',
     }
     response = client.post(
-        f'/organizations/{organization.id}/projects',
-        headers={'Authorization': f'Bearer {token}'},
+        urls.projects,
         json=project_data,
     )
     assert response.status_code == HTTPStatus.CREATED
     assert response.json()['name'] == project_data['name']
 
-    response = client.get(
-        f'/organizations/{organization.id}/projects',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.get(urls.projects)
     assert response.status_code == HTTPStatus.OK
     assert any(
         project['name'] == project_data['name']
@@ -108,42 +290,29 @@ def test_create_project(
 
 def test_read_project(
     client: TestClient,
-    token: str,
-    organization: Organization,
+    urls: SimpleNamespace,
     project: Project,
 ):
-    response = client.get(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.get(urls.project)
     assert response.status_code == HTTPStatus.OK
     assert response.json()['name'] == project.name
 
 
 def test_read_project_with_files(
     client: TestClient,
-    token: str,
-    organization: Organization,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
+    count_queries: Callable[[], ContextManager[list[str]]],
 ):
     # Create a test file associated with the project
-    test_file = File(  # type: ignore
-        path='test_file.txt',
-        size=100,
-        project_id=project.id,
-        mime_type='text/plain',
-        original_filename='test_file.txt',
-    )
-    session.add(test_file)
-    session.commit()
-    session.refresh(project)
+    _insert_file(session, project.id)
 
-    response = client.get(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    with count_queries() as queries:
+        response = client.get(urls.project)
     assert response.status_code == HTTPStatus.OK
+    # The project lookup and the load of its files
+    assert len(queries) <= 2  # noqa: PLR2004
     response_json = response.json()
     assert response_json['name'] == project.name
     assert 'files' in response_json
@@ -152,50 +321,47 @@ def test_read_project_with_files(
     assert response_json['files'][0]['size'] == 100  # noqa: PLR2004
 
 
+@pytest.mark.parametrize(
+    ('method', 'target', 'body'),
+    [
+        (
+            'POST',
+            'projects',
+            {'name': 'New Project', 'description': 'New project description'},
+        ),
+        ('GET', 'project', None),
+        (
+            'PUT',
+            'project',
+            {'name': 'Updated Project', 'description': 'Updated description'},
+        ),
+        ('DELETE', 'project', None),
+    ],
+)
 def test_crud_project_for_wrong_organization(
-    client: TestClient, token: str, other_user: User
+    client: TestClient,
+    other_user: User,
+    method: str,
+    target: str,
+    body: dict[str, str] | None,
 ):
     organization = other_user.organizations[0]
     assert len(organization.projects) == 1  # project created in the fixture
-    organization_project = organization.projects[0]
-    # create
-    response = client.post(
-        f'/organizations/{organization.id}/projects',
-        headers={'Authorization': f'Bearer {token}'},
-        json={
-            'name': 'New Project',
-            'description': 'New project description',
-        },
-    )
-    assert response.status_code == HTTPStatus.NOT_FOUND
-    # read
-    response = client.get(
-        f'/organizations/{organization.id}/projects/{organization_project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
-    assert response.status_code == HTTPStatus.NOT_FOUND
-    # update
-    response = client.put(
-        f'/organizations/{organization.id}/projects/{organization_project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-        json={
-            'name': 'Updated Project',
-            'description': 'Updated description',
-        },
-    )
-    assert response.status_code == HTTPStatus.NOT_FOUND
-    # delete
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{organization_project.id}',
-        headers={'Authorization': f'Bearer {token}'},
+    url = f'/organizations/{organization.id}/projects'
+    if target == 'project':
+        url = f'{url}/{organization.projects[0].id}'
+
+    response = client.request(
+        method,
+        url,
+        json=body,
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
 
 
 def test_update_project(
     client: TestClient,
-    token: str,
-    organization: Organization,
+    urls: SimpleNamespace,
     project: Project,
 ):
     updated_data = {
@@ -203,8 +369,7 @@ def test_update_project(
         'description': 'Updated description',
     }
     response = client.put(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
+        urls.project,
         json=updated_data,
     )
     assert response.status_code == HTTPStatus.OK
@@ -213,227 +378,199 @@ def test_update_project(
 
 def test_delete_project(
     client: TestClient,
-    token: str,
-    organization: Organization,
+    urls: SimpleNamespace,
     project: Project,
 ):
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.delete(urls.project)
     assert response.status_code == HTTPStatus.NO_CONTENT
 
     # Verify the project is deleted
-    response = client.get(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.get(urls.project)
     assert response.status_code == HTTPStatus.NOT_FOUND
 
 
 def test_upload_file(
     client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
+    urls: SimpleNamespace,
+    mock_upload: AsyncMock,
+    mock_get_url: AsyncMock,
+    mock_extract_text: AsyncMock,
 ):
-    # Simulate a file upload
-    file_content = b'%PDF-1.4 fake pdf content'
-    files = [('files', ('test.pdf', file_content, 'application/pdf'))]
-
-    # Mock the upload_file_to_s3 function and prevent background tasks
-    with (
-        patch('app.routers.projects.upload_file_to_s3') as mock_upload,
-        patch('app.routers.projects.get_download_url'),
-        patch('app.routers.projects.document_service.extract_text'),
-    ):
-        mock_upload.return_value = FileSchema(
-            path='mocked/path/to/test.pdf',
-            size=len(file_content),
-            mime_type='application/pdf',
-            original_filename='test.pdf',
-            contents=None,
-            processed_at=None,
-        )
+    # Mock the upload; the endpoint assigns the file id, so pass a copy
+    mock_upload.return_value = _MOCKED_FILE.model_copy()
 
-        # Call the endpoint
-        response = client.post(
-            f'/organizations/{organization.id}/projects/{project.id}/files',
-            headers={'Authorization': f'Bearer {token}'},
-            files=files,
-        )
+    # Call the endpoint
+    response = client.post(
+        urls.files,
+        files=_PDF_FILES,
+    )
 
-        # Assertions
-        assert response.status_code == HTTPStatus.CREATED
-        response_json = response.json()
-        assert isinstance(response_json, list)
-        assert len(response_json) == 1
-        file_response = response_json[0]
-        assert file_response['path'] == 'mocked/path/to/test.pdf'
-        assert file_response['size'] == len(file_content)
+    # Assertions
+    assert response.status_code == HTTPStatus.CREATED
+    response_json = response.json()
+    assert isinstance(response_json, list)
+    assert len(response_json) == 1
+    file_response = response_json[0]
+    assert file_response['path'] == 'mocked/path/to/test.pdf'
+    assert file_response['size'] == len(_PDF_BYTES)
 
-        # Ensure only the upload mock was called
-        mock_upload.assert_called_once()
+    # Ensure only the upload mock was called
+    mock_upload.assert_called_once()
 
 
-@pytest.mark.asyncio
-async def test_upload_file_with_processing(
+def test_upload_multiple_files(
     client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
+    urls: SimpleNamespace,
     session: Session,
+    mock_upload: AsyncMock,
+    mock_get_url: AsyncMock,
 ):
-    # Simulate a file upload
-    file_content = b'%PDF-1.4 fake pdf content'
-    files = [('files', ('test.pdf', file_content, 'application/pdf'))]
-
-    # Mock the upload_file_to_s3 function and get_download_url
-    with (
-        patch('app.routers.projects.upload_file_to_s3') as mock_upload,
-        patch('app.routers.projects.get_download_url') as mock_get_url,
-        patch('httpx.AsyncClient') as mock_client,
-    ):
-        # Setup mock for file upload
-        mock_upload.return_value = FileSchema(
-            path='mocked/path/to/test.pdf',
-            size=len(file_content),
-            mime_type='application/pdf',
-            original_filename='test.pdf',
+    files = [
+        ('files', (f'test{i}.txt', b'test content', 'text/plain'))
+        for i in range(3)
+    ]
+
+    mock_upload.side_effect = [
+        FileSchema(
+            path=f'mocked/path/to/test{i}.txt',
+            size=12,
+            mime_type='text/plain',
+            original_filename=f'test{i}.txt',
             contents=None,
             processed_at=None,
         )
+        for i in range(3)
+    ]
 
-        # Setup mock for download URL
-        mock_get_url.return_value = 'https://example.com/test.pdf'
+    response = client.post(
+        urls.files,
+        files=files,
+    )
 
-        # Setup mock for HTTP client
-        mock_response = MagicMock()
-        mock_response.text = 'processed content'
-        mock_response.raise_for_status = lambda: None
-        mock_client.return_value.__aenter__.return_value.post.return_value = (
-            mock_response
-        )
+    assert response.status_code == HTTPStatus.CREATED
+    ids = [uuid.UUID(file['id']) for file in response.json()]
+    db_files = session.scalars(select(File).where(File.id.in_(ids))).all()
+    assert sorted(file.path for file in db_files) == [
+        f'mocked/path/to/test{i}.txt' for i in range(3)
+    ]
 
-        # Call the endpoint
-        response = client.post(
-            f'/organizations/{organization.id}/projects/{project.id}/files',
-            headers={'Authorization': f'Bearer {token}'},
-            files=files,
-        )
 
-        # Assertions for response
-        assert response.status_code == HTTPStatus.CREATED
-        response_json = response.json()
-        assert isinstance(response_json, list)
-        assert len(response_json) == 1
-        file_response = response_json[0]
-        assert file_response['path'] == 'mocked/path/to/test.pdf'
-        assert file_response['size'] == len(file_content)
-
-        # Verify file was created in database
-        db_file = (
-            session.query(File)
-            .filter_by(path='mocked/path/to/test.pdf')
-            .first()
-        )
-        assert db_file is not None
-        assert db_file.original_filename == 'test.pdf'
+def test_upload_file_too_large(
+    client: TestClient,
+    urls: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+    mock_upload: AsyncMock,
+):
+    monkeypatch.setattr('app.api.settings.MAX_UPLOAD_BYTES', 10)
+
+    response = client.post(
+        urls.files,
+        files=_PDF_FILES,
+    )
 
-        # Verify processing completed and database was updated
-        assert db_file.processed_at is not None
-        assert db_file.contents is not None
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    mock_upload.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_with_processing(  # noqa: PLR0913, PLR0917
+    async_client: httpx.AsyncClient,
+    urls: SimpleNamespace,
+    session: Session,
+    mock_upload: AsyncMock,
+    mock_get_url: AsyncMock,
+    processing_client: httpx.AsyncClient,
+):
+    # Setup mock for file upload, copied as the endpoint assigns its id
+    mock_upload.return_value = _MOCKED_FILE.model_copy()
+
+    # Setup mock for download URL
+    mock_get_url.return_value = 'https://example.com/test.pdf'
+
+    # Call the endpoint
+    response = await async_client.post(
+        urls.files,
+        files=_PDF_FILES,
+    )
+
+    # Assertions for response
+    assert response.status_code == HTTPStatus.CREATED
+    response_json = response.json()
+    assert isinstance(response_json, list)
+    assert len(response_json) == 1
+    file_response = response_json[0]
+    assert file_response['path'] == 'mocked/path/to/test.pdf'
+    assert file_response['size'] == len(_PDF_BYTES)
+
+    # Verify file was created in database
+    db_file = session.scalars(
+        select(File).where(File.path == 'mocked/path/to/test.pdf')
+    ).one_or_none()
+    assert db_file is not None
+    assert db_file.original_filename == 'test.pdf'
 
-        # Verify the HTTP request was made
-        mock_client.return_value.__aenter__.return_value.post.assert_called_once()
+    # Verify processing completed and database was updated
+    assert db_file.processed_at is not None
+    assert db_file.contents == 'processed content'
 
 
 def test_delete_file(
     client: TestClient,
-    token: str,
-    organization: Organization,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
+    mock_delete: AsyncMock,
 ):
     # Create three file records in the database
-    db_files = [
-        File(  # type: ignore
-            path=f'projects/test-project/test{i}.txt',
-            size=100,
-            project_id=project.id,
-            mime_type='text/plain',
-            original_filename=f'test{i}.txt',
-        )
-        for i in range(3)
-    ]
-    session.add_all(db_files)
-    session.commit()
+    db_files = _insert_files(session, project)
 
     # Test deleting a single file
-    with patch('app.routers.projects.delete_file_from_s3') as mock_delete:
-        response = client.delete(
-            f'/organizations/{organization.id}/projects/{project.id}/files',
-            headers={'Authorization': f'Bearer {token}'},
-            params={'ids[]': str(db_files[0].id)},
-        )
+    response = client.delete(
+        urls.files,
+        params={'ids[]': str(db_files[0].id)},
+    )
 
-        # Assertions for single file deletion
-        assert response.status_code == HTTPStatus.NO_CONTENT
-        mock_delete.assert_called_once_with(db_files[0].path)
-        assert (
-            session.query(File).filter(File.id == db_files[0].id).first()
-            is None
-        )
-        assert (
-            session.query(File).filter(File.id == db_files[1].id).first()
-            is not None
-        )
+    # Assertions for single file deletion
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    mock_delete.assert_called_once_with(db_files[0].path)
+    assert session.get(File, db_files[0].id) is None
+    assert session.get(File, db_files[1].id) is not None
 
     # Test deleting multiple files
-    with patch('app.routers.projects.delete_file_from_s3') as mock_delete:
-        response = client.delete(
-            f'/organizations/{organization.id}/projects/{project.id}/files',
-            headers={'Authorization': f'Bearer {token}'},
-            params={'ids[]': [str(db_files[1].id), str(db_files[2].id)]},
-        )
+    mock_delete.reset_mock()
+    response = client.delete(
+        urls.files,
+        params={'ids[]': [str(db_files[1].id), str(db_files[2].id)]},
+    )
 
-        # Assertions for multiple file deletion
-        assert response.status_code == HTTPStatus.NO_CONTENT
+    # Assertions for multiple file deletion
+    assert response.status_code == HTTPStatus.NO_CONTENT
 
-        # Verify both files were deleted from S3
-        mock_delete.assert_has_calls(
-            [
-                call(db_files[1].path),
-                call(db_files[2].path),
-            ],
-            any_order=True,
-        )
-        assert mock_delete.call_count == 2  # noqa: PLR2004
+    # Verify both files were deleted from S3
+    mock_delete.assert_has_calls(
+        [
+            call(db_files[1].path),
+            call(db_files[2].path),
+        ],
+        any_order=True,
+    )
+    assert mock_delete.call_count == 2  # noqa: PLR2004
 
-        # Verify both files were deleted from database
-        assert (
-            session.query(File).filter(File.id == db_files[1].id).first()
-            is None
-        )
-        assert (
-            session.query(File).filter(File.id == db_files[2].id).first()
-            is None
-        )
+    # Verify both files were deleted from database
+    assert session.get(File, db_files[1].id) is None
+    assert session.get(File, db_files[2].id) is None
 
 
 def test_delete_nonexistent_file(
     client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
+    urls: SimpleNamespace,
 ):
     # Use a random UUID that doesn't exist in the database
     nonexistent_file_id = uuid.uuid4()
 
     # Call the endpoint
     response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}/files',
-        headers={'Authorization': f'Bearer {token}'},
+        urls.files,
         params={'ids[]': str(nonexistent_file_id)},
     )
 
@@ -444,7 +581,6 @@ def test_delete_nonexistent_file(
 
 def test_delete_file_wrong_organization(
     client: TestClient,
-    token: str,
     other_user: User,
     session: Session,
 ):
@@ -452,20 +588,11 @@ def test_delete_file_wrong_organization(
     project = organization.projects[0]
 
     # Create a file record in the database
-    db_file = File(  # type: ignore
-        path='projects/test-project/test.txt',
-        size=100,
-        project_id=project.id,
-        mime_type='text/plain',
-        original_filename='test.txt',
-    )
-    session.add(db_file)
-    session.commit()
+    db_file = _insert_file(session, project.id)
 
     # Call the endpoint
     response = client.delete(
         f'/organizations/{organization.id}/projects/{project.id}/files',
-        headers={'Authorization': f'Bearer {token}'},
         params={'ids[]': str(db_file.id)},
     )
 
@@ -475,129 +602,40 @@ def test_delete_file_wrong_organization(
 
 def test_upload_file_wrong_organization(
     client: TestClient,
-    token: str,
     other_user: User,
 ):
-    # Create a file for upload
-    file_content = b'test content'
-    files = [('files', ('test.txt', file_content, 'text/plain'))]
-
     # Try to upload to a project in an organization the user doesn't belong to
     response = client.post(
         f'/organizations/{other_user.organizations[0].id}/projects/{other_user.organizations[0].projects[0].id}/files',
-        files=files,
-        headers={'Authorization': f'Bearer {token}'},
+        files=_PDF_FILES,
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
 
 
-@pytest.mark.asyncio
-async def test_project_deletion_with_files(
-    client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
-    session: Session,
-):
-    # Create some test files in the database
-    files = [
-        File(  # type: ignore
-            path=f'projects/{project.id}/test{i}.txt',
-            size=100,
-            mime_type='text/plain',
-            original_filename=f'test{i}.txt',
-            project_id=project.id,
-        )
-        for i in range(3)
-    ]
-    session.add_all(files)
-    session.commit()
-    for file in files:
-        session.refresh(file)
-
-    # Delete the project
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
-    assert response.status_code == HTTPStatus.NO_CONTENT
-
-    # Verify project is marked as deleted but files still exist
-    db_project = session.get(Project, project.id)
-    assert db_project is not None
-    assert db_project.deleted_at is not None
-
-    for file in files:
-        db_file = session.get(File, file.id)
-        assert db_file is not None
-
-
-@pytest.mark.asyncio
-async def test_project_deletion_handles_s3_error(
+@pytest.mark.parametrize('file_count', [0, 1, 3])
+def test_soft_delete_project(  # noqa: PLR0913, PLR0917
     client: TestClient,
-    token: str,
-    organization: Organization,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
+    s3_client: MagicMock,
+    file_count: int,
 ):
-    # Create a test file
-    file = File(  # type: ignore
-        path=f'projects/{project.id}/test.txt',
-        size=100,
-        mime_type='text/plain',
-        original_filename='test.txt',
-        project_id=project.id,
-    )
-    session.add(file)
-    session.commit()
-    session.refresh(file)
-
-    # Delete the project
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
-
-    # Expect success
-    assert response.status_code == HTTPStatus.NO_CONTENT
-
-    # Verify project is marked as deleted but file still exists
-    db_project = session.get(Project, project.id)
-    assert db_project is not None
-    assert db_project.deleted_at is not None
+    # Add files to the project
+    files = _insert_files(session, project, file_count) if file_count else []
 
-    db_file = session.get(File, file.id)
-    assert db_file is not None
-
-
-def test_soft_delete_project(
-    client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
-    session: Session,
-):
     # Delete the project
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.delete(urls.project)
     assert response.status_code == HTTPStatus.NO_CONTENT
 
     # Verify project is not in the list
-    response = client.get(
-        f'/organizations/{organization.id}/projects',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.get(urls.projects)
     assert response.status_code == HTTPStatus.OK
     data = response.json()
     assert len(data['projects']) == 0
 
     # Verify project cannot be accessed directly
-    response = client.get(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = client.get(urls.project)
     assert response.status_code == HTTPStatus.NOT_FOUND
 
     # Verify project exists in database with deleted_at timestamp
@@ -605,54 +643,21 @@ def test_soft_delete_project(
     assert db_project is not None
     assert db_project.deleted_at is not None
 
-
-def test_soft_delete_project_with_files(
-    client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
-    session: Session,
-):
-    # Add a file to the project
-    file = File(  # type: ignore
-        path='test/path',
-        size=100,
-        mime_type='text/plain',
-        original_filename='test.txt',
-        project_id=project.id,
-    )
-    session.add(file)
-    session.commit()
-
-    # Delete the project
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}',
-        headers={'Authorization': f'Bearer {token}'},
-    )
-    assert response.status_code == HTTPStatus.NO_CONTENT
-
-    # Verify project and file still exist in database
-    db_project = session.get(Project, project.id)
-    assert db_project is not None
-    assert db_project.deleted_at is not None
-
-    db_file = session.get(File, file.id)
-    assert db_file is not None
+    # Verify files are kept, both in the database and in S3
+    file_ids = {file.id for file in files}
+    assert _existing_file_ids(session, file_ids) == file_ids
+    s3_client.delete_object.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_hard_delete_project(
-    client: TestClient,
-    token: str,
-    organization: Organization,
+    async_client: httpx.AsyncClient,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
 ):
     # Delete the project
-    response = client.delete(
-        f'/organizations/{organization.id}/projects/{project.id}/hard',
-        headers={'Authorization': f'Bearer {token}'},
-    )
+    response = await async_client.delete(urls.hard)
     assert response.status_code == HTTPStatus.NO_CONTENT
 
     # Verify project is completely removed from database
@@ -662,56 +667,33 @@ async def test_hard_delete_project(
 
 @pytest.mark.asyncio
 async def test_hard_delete_project_with_files(
-    client: TestClient,
-    token: str,
-    organization: Organization,
+    async_client: httpx.AsyncClient,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
+    s3_client: MagicMock,
 ):
     # Create some test files in the database
-    files = [
-        File(  # type: ignore
-            path=f'projects/{project.id}/test{i}.txt',
-            size=100,
-            mime_type='text/plain',
-            original_filename=f'test{i}.txt',
-            project_id=project.id,
-        )
-        for i in range(3)
-    ]
-    session.add_all(files)
-    session.commit()
-    for file in files:
-        session.refresh(file)
+    files = _insert_files(session, project)
 
     # Mock the S3 deletion
-    with patch('app.services.upload_service.boto3.client') as mock_s3:
-        mock_s3_client: S3Client = mock_s3.return_value
-        mock_s3_client.delete_object = MagicMock(  # type: ignore
-            return_value={
-                'ResponseMetadata': {'HTTPStatusCode': HTTPStatus.NO_CONTENT}
-            }
-        )
+    s3_client.delete_object.return_value = {
+        'ResponseMetadata': {'HTTPStatusCode': HTTPStatus.NO_CONTENT}
+    }
 
-        # Delete the project
-        response = client.delete(
-            f'/organizations/{organization.id}/projects/{project.id}/hard',
-            headers={'Authorization': f'Bearer {token}'},
-        )
-        assert response.status_code == HTTPStatus.NO_CONTENT
-
-        # Verify S3 files were deleted
-        assert mock_s3_client.delete_object.call_count == 3  # noqa: PLR2004
-        for file in files:
-            mock_s3_client.delete_object.assert_any_call(
-                Bucket=settings.BUCKET_NAME,
-                Key=file.path,
-            )
+    # Delete the project
+    response = await async_client.delete(urls.hard)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+
+    # Verify S3 files were deleted
+    assert s3_client.delete_object.call_count == 3  # noqa: PLR2004
+    expected = [
+        call(Bucket=settings.BUCKET_NAME, Key=file.path) for file in files
+    ]
+    s3_client.delete_object.assert_has_calls(expected, any_order=True)
 
     # Verify files are deleted from database
-    for file in files:
-        db_file = session.get(File, file.id)
-        assert db_file is None
+    assert _existing_file_ids(session, {file.id for file in files}) == set()
 
     # Verify project is deleted
     db_project = session.get(Project, project.id)
@@ -720,49 +702,34 @@ async def test_hard_delete_project_with_files(
 
 @pytest.mark.asyncio
 async def test_hard_delete_project_handles_s3_error(
-    client: TestClient,
-    token: str,
-    organization: Organization,
+    async_client: httpx.AsyncClient,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
+    s3_client: MagicMock,
 ):
     # Create a test file
-    file = File(  # type: ignore
-        path=f'projects/{project.id}/test.txt',
-        size=100,
-        mime_type='text/plain',
-        original_filename='test.txt',
-        project_id=project.id,
+    file = _insert_file(
+        session, project.id, path=f'projects/{project.id}/test.txt'
     )
-    session.add(file)
-    session.commit()
-    session.refresh(file)
 
     # Mock S3 deletion to fail
-    with patch('app.services.upload_service.boto3.client') as mock_s3:
-        mock_s3_client: S3Client = mock_s3.return_value
-        mock_s3_client.delete_object = MagicMock(  # type: ignore
-            return_value={
-                'ResponseMetadata': {
-                    'HTTPStatusCode': HTTPStatus.INTERNAL_SERVER_ERROR
-                }
-            }
-        )
+    s3_client.delete_object.side_effect = ClientError(
+        {'Error': {'Code': 'InternalError', 'Message': 'Failed'}},
+        'DeleteObject',
+    )
 
-        # Delete the project
-        response = client.delete(
-            f'/organizations/{organization.id}/projects/{project.id}/hard',
-            headers={'Authorization': f'Bearer {token}'},
-        )
+    # Delete the project
+    response = await async_client.delete(urls.hard)
 
-        # Expect success even if S3 deletion fails
-        assert response.status_code == HTTPStatus.NO_CONTENT
+    # Expect success even if S3 deletion fails
+    assert response.status_code == HTTPStatus.NO_CONTENT
 
-        # Verify S3 deletion was attempted
-        mock_s3_client.delete_object.assert_called_once_with(
-            Bucket=settings.BUCKET_NAME,
-            Key=file.path,
-        )
+    # Verify S3 deletion was attempted
+    s3_client.delete_object.assert_called_once_with(
+        Bucket=settings.BUCKET_NAME,
+        Key=file.path,
+    )
 
     # Verify database records are deleted even if S3 deletion fails
     db_file = session.get(File, file.id)
@@ -773,50 +740,33 @@ async def test_hard_delete_project_handles_s3_error(
 
 @pytest.mark.asyncio
 async def test_download_file(
-    client: TestClient,
-    token: str,
-    organization: Organization,
+    async_client: httpx.AsyncClient,
+    urls: SimpleNamespace,
     project: Project,
     session: Session,
+    mock_get_url: AsyncMock,
 ):
     # Create a test file in the database
-    file = File(  # type: ignore
-        project_id=project.id,
-        path='test/path/file.txt',
-        original_filename='test_file.txt',
-        size=1000,
-        mime_type='text/plain',
-    )
-    session.add(file)
-    session.commit()
-    session.refresh(file)
+    file = _insert_file(session, project.id, path='test/path/file.txt')
 
     # Mock the get_download_url function
     mock_url = 'https://example.com/download/test_file.txt'
-    with patch(
-        'app.routers.projects.get_download_url', return_value=mock_url
-    ) as mock_get_url:
-        response = client.get(
-            f'/organizations/{organization.id}/projects/{project.id}/files/{file.id}/download',
-            headers={'Authorization': f'Bearer {token}'},
-        )
+    mock_get_url.return_value = mock_url
+    response = await async_client.get(f'{urls.files}/{file.id}/download')
 
-        assert response.status_code == HTTPStatus.OK
-        assert response.json() == {'download_url': mock_url}
-        mock_get_url.assert_called_once_with(file.path, file.original_filename)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'download_url': mock_url}
+    mock_get_url.assert_called_once_with(file.path, file.original_filename)
 
 
 @pytest.mark.asyncio
 async def test_download_nonexistent_file(
-    client: TestClient,
-    token: str,
-    organization: Organization,
-    project: Project,
+    async_client: httpx.AsyncClient,
+    urls: SimpleNamespace,
 ):
     nonexistent_file_id = uuid.uuid4()
-    response = client.get(
-        f'/organizations/{organization.id}/projects/{project.id}/files/{nonexistent_file_id}/download',
-        headers={'Authorization': f'Bearer {token}'},
+    response = await async_client.get(
+        f'{urls.files}/{nonexistent_file_id}/download'
     )
 
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -825,35 +775,18 @@ async def test_download_nonexistent_file(
 
 @pytest.mark.asyncio
 async def test_download_file_wrong_organization(
-    client: TestClient,
-    token: str,
+    async_client: httpx.AsyncClient,
     other_user: User,
     session: Session,
 ):
-    # Create a project and file in a different organization
+    # Create a file in a project of a different organization
     other_org = other_user.organizations[0]
-    project = Project(  # type: ignore
-        name='Other Project',
-        description='Another test project',
-        organization_id=other_org.id,
-        organization=other_org,
-    )
-    session.add(project)
-    session.commit()
+    project = other_org.projects[0]
 
-    file = File(  # type: ignore
-        project_id=project.id,
-        path='test/path/file.txt',
-        original_filename='test_file.txt',
-        size=1000,
-        mime_type='text/plain',
-    )
-    session.add(file)
-    session.commit()
+    file = _insert_file(session, project.id)
 
-    response = client.get(
-        f'/organizations/{other_org.id}/projects/{project.id}/files/{file.id}/download',
-        headers={'Authorization': f'Bearer {token}'},
+    response = await async_client.get(
+        f'/organizations/{other_org.id}/projects/{project.id}/files/{file.id}/download'
     )
 
     assert response.status_code == HTTPStatus.NOT_FOUND
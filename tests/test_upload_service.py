@@ -1,62 +1,106 @@
-from unittest.mock import MagicMock, patch
+import io
+import zipfile
+from http import HTTPStatus
+from unittest.mock import MagicMock
 from uuid import UUID
 
-import boto3
 import pytest
-from botocore.stub import Stubber
-from fastapi import UploadFile
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, UploadFile
 
-from app.services.upload_service import upload_file_to_s3
-from app.settings import Settings
+from app.services.upload_service import settings, upload_file_to_s3
 
-settings = Settings.model_validate({})
 
+def _ooxml(part: str) -> bytes:
+    """
+    Builds a minimal Office Open XML package whose main part starts past
+    the first 2 KiB, as in documents saved with document properties.
+    """
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as package:
+        package.writestr('[Content_Types].xml', '<Types/>')
+        package.writestr('_rels/.rels', '<Relationships/>')
+        package.writestr('docProps/app.xml', ' ' * 3000)
+        package.writestr(part, '<document/>')
+    return archive.getvalue()
 
-@pytest.mark.asyncio
-async def test_upload_file_to_s3():
-    # Initialize a real boto3 S3 client and wrap it with Stubber
-    s3_client = boto3.client('s3')
-    stubber = Stubber(s3_client)
 
+@pytest.mark.asyncio
+async def test_upload_file_to_s3(
+    monkeypatch: pytest.MonkeyPatch, s3_client: MagicMock
+):
     # Mock UUID generation to return a fixed value
     file_id = UUID('327d7bdb-f820-412f-8c5a-34f61ff321be')
     project_id = UUID('43563e54-7423-4079-b4b9-27a5fa9b8fdf')
 
-    # Mock the response for put_object
-
-    with patch('app.services.upload_service.uuid4', return_value=file_id):
-        # Mock the response for put_object
-        expected_response = {'ResponseMetadata': {'HTTPStatusCode': 200}}
-        stubber.add_response(
-            'put_object',
-            expected_response,
-            {
-                'Body': b'Sample file content',
-                'Bucket': settings.BUCKET_NAME,
-                'ContentType': 'text/plain',
-                'Key': f'projects/{project_id}/{file_id}.txt',
-            },
-        )
-
-        # Activate the Stubber
-        stubber.activate()
-
-        # Mock UploadFile to simulate an uploaded file
-        file_content = b'Sample file content'
-        file = UploadFile(filename='test.txt', file=MagicMock())
-        file.file.read = MagicMock(return_value=file_content)
-
-        # Patch the S3 client used in the service to use the stubbed client
-        with patch(
-            'app.services.upload_service.boto3.client',
-            return_value=s3_client,
-        ):
-            # Call the upload function
-            result = await upload_file_to_s3(project_id, file)
-
-            # Assertions
-            assert result.path == f'projects/{project_id}/{file_id}.txt'
-            assert result.size == len(file_content)
-
-        # Deactivate the Stubber
-        stubber.deactivate()
+    monkeypatch.setattr('app.services.upload_service.uuid4', lambda: file_id)
+
+    # Mock UploadFile to simulate an uploaded file
+    file_content = b'Sample file content'
+    file = UploadFile(filename='test.txt', file=io.BytesIO(file_content))
+
+    # Call the upload function
+    result = await upload_file_to_s3(project_id, file)
+
+    # Assertions
+    s3_client.put_object.assert_called_once_with(
+        Body=file.file,
+        Bucket=settings.BUCKET_NAME,
+        ContentType='text/plain',
+        Key=f'projects/{project_id}/32/{file_id}.txt',
+    )
+    assert result.path == f'projects/{project_id}/32/{file_id}.txt'
+    assert result.size == len(file_content)
+
+
+@pytest.mark.parametrize(
+    ('content', 'extension'),
+    [
+        (b'a,b,c\n1,2,3\n4,5,6\n', '.csv'),
+        (b'<!DOCTYPE html><html><body>text</body></html>', '.html'),
+        (b'{"a": [1, 2, 3]}', '.json'),
+        (_ooxml('word/document.xml'), '.docx'),
+        (_ooxml('xl/workbook.xml'), '.xlsx'),
+        (_ooxml('ppt/presentation.xml'), '.pptx'),
+    ],
+    ids=['csv', 'html', 'json', 'docx', 'xlsx', 'pptx'],
+)
+@pytest.mark.asyncio
+async def test_upload_file_to_s3_document_types(
+    s3_client: MagicMock, content: bytes, extension: str
+):
+    file = UploadFile(filename='upload', file=io.BytesIO(content))
+
+    result = await upload_file_to_s3(UUID(int=1), file)
+
+    assert result.path.endswith(extension)
+    s3_client.put_object.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_to_s3_unsupported_type(s3_client: MagicMock):
+    file = UploadFile(
+        filename='test.bin', file=io.BytesIO(b'\x00\x01\x02\x03\xff\xfe')
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await upload_file_to_s3(UUID(int=1), file)
+
+    assert exc_info.value.status_code == HTTPStatus.BAD_REQUEST
+    s3_client.put_object.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_upload_file_to_s3_client_error(s3_client: MagicMock):
+    file = UploadFile(
+        filename='test.txt', file=io.BytesIO(b'Sample file content')
+    )
+
+    s3_client.put_object.side_effect = ClientError(
+        {'Error': {'Code': 'SlowDown', 'Message': 'Reduce request rate'}},
+        'PutObject',
+    )
+    with pytest.raises(HTTPException) as exc_info:
+        await upload_file_to_s3(UUID(int=1), file)
+
+    assert exc_info.value.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
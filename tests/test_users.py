@@ -1,36 +1,32 @@
+import json
 from http import HTTPStatus
 
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+from httpx import AsyncClient
 
 from app.models import User
-from app.security import get_password_hash
 
+# Request bodies are encoded once and sent as raw content
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_CREATE_BODY = json.dumps({
+    'email': 'alice@example.com',
+    'password': 'secret',
+}).encode()
+_UPDATE_BODY = json.dumps({
+    'email': 'bob@example.com',
+    'password': 'mynewpassword',
+}).encode()
 
-@pytest.fixture
-def other_user(session: Session) -> User:
-    user = User(  # type: ignore
-        email='test2@example.com',
-        password=get_password_hash('securepassword'),
-    )
-
-    session.add(user)
-    session.commit()
-    session.refresh(user)
-
-    user.clean_password = 'securepassword'  # type: ignore
 
-    return user
+@pytest.fixture(scope='session')
+def json_auth_headers(auth_headers: dict[str, str]) -> dict[str, str]:
+    return {**auth_headers, **_JSON_HEADERS}
 
 
-def test_create_user(client: TestClient):
-    response = client.post(
-        '/users/',
-        json={
-            'email': 'alice@example.com',
-            'password': 'secret',
-        },
+@pytest.mark.asyncio
+async def test_create_user(async_client: AsyncClient):
+    response = await async_client.post(
+        '/users/', content=_CREATE_BODY, headers=_JSON_HEADERS
     )
     assert response.status_code == HTTPStatus.CREATED
 
@@ -40,55 +36,60 @@ def test_create_user(client: TestClient):
     assert any(org['name'] == 'Default' for org in data['organizations'])
 
 
-def test_cannot_read_users(client: TestClient):
-    response = client.get('/users')
+@pytest.mark.asyncio
+async def test_cannot_read_users(async_client: AsyncClient):
+    response = await async_client.get('/users')
     assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
 
 
-def test_update_user(client: TestClient, user: User, token: str):
-    response = client.put(
+@pytest.mark.asyncio
+async def test_update_user(
+    async_client: AsyncClient, user: User, json_auth_headers: dict[str, str]
+):
+    response = await async_client.put(
         f'/users/{user.id}',
-        headers={'Authorization': f'Bearer {token}'},
-        json={
-            'email': 'bob@example.com',
-            'password': 'mynewpassword',
-        },
+        headers=json_auth_headers,
+        content=_UPDATE_BODY,
     )
     assert response.status_code == HTTPStatus.OK
     assert response.json()['email'] == 'bob@example.com'
 
 
-def test_delete_user(client: TestClient, user: User, token: str):
-    response = client.delete(
+@pytest.mark.asyncio
+async def test_delete_user(
+    async_client: AsyncClient, user: User, auth_headers: dict[str, str]
+):
+    response = await async_client.delete(
         f'/users/{user.id}',
-        headers={'Authorization': f'Bearer {token}'},
+        headers=auth_headers,
     )
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'User deleted'}
 
 
-def test_update_user_with_wrong_user(
-    client: TestClient, other_user: User, token: str
+@pytest.mark.asyncio
+async def test_update_user_with_wrong_user(
+    async_client: AsyncClient,
+    other_user: User,
+    json_auth_headers: dict[str, str],
 ):
-    response = client.put(
+    response = await async_client.put(
         f'/users/{other_user.id}',
-        headers={'Authorization': f'Bearer {token}'},
-        json={
-            'email': 'bob@example.com',
-            'password': 'mynewpassword',
-        },
+        headers=json_auth_headers,
+        content=_UPDATE_BODY,
     )
     assert response.status_code == HTTPStatus.BAD_REQUEST
     assert response.json() == {'detail': 'Not enough permissions'}
 
 
-def test_delete_user_wrong_user(
-    client: TestClient, other_user: User, token: str
+@pytest.mark.asyncio
+async def test_delete_user_wrong_user(
+    async_client: AsyncClient, other_user: User, auth_headers: dict[str, str]
 ):
-    response = client.delete(
+    response = await async_client.delete(
         f'/users/{other_user.id}',
-        headers={'Authorization': f'Bearer {token}'},
+        headers=auth_headers,
     )
     assert response.status_code == HTTPStatus.BAD_REQUEST
     assert response.json() == {'detail': 'Not enough permissions'}
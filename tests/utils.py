@@ -0,0 +1,32 @@
+import asyncio
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def persist(connection: Connection, *instances: object) -> None:
+    """
+    Stores shared fixture rows in the outer transaction, so they remain
+    visible to every test. Instances are left detached, with the attributes
+    they were built with still loaded.
+    """
+    with Session(
+        bind=connection,
+        join_transaction_mode='create_savepoint',
+        expire_on_commit=False,
+    ) as session:
+        session.add_all(instances)
+        session.commit()
+
+
+async def wait_for_pending_deletions() -> None:
+    """
+    Waits for the S3 deletions scheduled by Project deletion events, so
+    they reach the S3 mock of the test that triggered them.
+    """
+    if models._pending_deletions:
+        await asyncio.gather(
+            *models._pending_deletions, return_exceptions=True
+        )